@@ -0,0 +1,424 @@
+import asyncio
+import os
+import random
+import selectors
+
+import write_through
+from write_through import (
+    HDD_READ_LATENCY,
+    HDD_WRITE_LATENCY,
+    SSD_READ_LATENCY,
+    SSD_WRITE_LATENCY,
+)
+
+# Front-end bất đồng bộ (asyncio) cho Write-Through + LRU
+# Nhiều client gửi request vào hàng đợi có giới hạn, số I/O đồng thời mỗi thiết bị bị giới hạn,
+# các read miss cùng block đang chờ HDD được gộp lại (chỉ một lần đọc HDD)
+# ============================================================================
+
+# ============================================================================
+# 1. THAM SỐ CẤU HÌNH
+# ============================================================================
+QUEUE_SIZE = 16  # Số request tối đa chờ trong hàng đợi
+HDD_CONCURRENCY = 4  # Số I/O HDD đồng thời tối đa
+SSD_CONCURRENCY = 8  # Số I/O SSD đồng thời tối đa
+WORKERS = 16  # Số coroutine xử lý request
+CLIENTS_PER_TRACE = 8  # Mỗi workload được chia cho bấy nhiêu client chạy song song
+
+
+# ============================================================================
+# 2. ĐỒNG HỒ ẢO
+# ============================================================================
+class VirtualTimeSelector(selectors.DefaultSelector):
+    """Selector không chờ thật: nhảy thẳng đồng hồ ảo tới sự kiện hẹn giờ kế tiếp"""
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # Không còn hẹn giờ nào và không có việc sẵn sàng: mọi coroutine đang chờ một future
+            # không bao giờ xong (worker chết, future không được resolve...)
+            raise RuntimeError("virtual clock deadlock")
+        if timeout:
+            self.now += timeout
+        return super().select(0)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop dùng đồng hồ ảo: asyncio.sleep(latency) tốn thời gian mô phỏng
+    chứ không tốn thời gian thật, nên kết quả lặp lại được
+    """
+    def __init__(self):
+        self.clock = VirtualTimeSelector()
+        super().__init__(self.clock)
+
+    def time(self):
+        return self.clock.now
+
+
+# ============================================================================
+# 3. FRONT-END BẤT ĐỒNG BỘ
+# ============================================================================
+class Request:
+    def __init__(self, op, blockID, value, submitted):
+        self.op = op
+        self.blockID = blockID
+        self.value = value
+        self.submitted = submitted  # Thời điểm client gửi (giây ảo)
+        self.done = asyncio.get_running_loop().create_future()
+
+
+class AsyncCacheFrontend:
+    def __init__(self, system, queue_size=QUEUE_SIZE, hdd_concurrency=HDD_CONCURRENCY,
+                 ssd_concurrency=SSD_CONCURRENCY, workers=WORKERS):
+        self.system = system
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.hddSlots = asyncio.Semaphore(hdd_concurrency)
+        self.ssdSlots = asyncio.Semaphore(ssd_concurrency)
+        self.workerCount = workers
+        self.workers = []
+
+        # blockID -> future của read miss đang chờ HDD (để gộp các miss cùng block)
+        self.inflight = {}
+
+        # Thống kê
+        self.completed = 0
+        self.coalescedReads = 0  # Số lần đọc HDD tiết kiệm nhờ gộp miss
+        self.latencies = []  # Thời gian phản hồi từng request (ms), gồm cả thời gian chờ hàng đợi
+        self.maxQueueDepth = 0
+        self.queueDepthArea = 0.0  # Tích phân độ dài hàng đợi theo thời gian (tính trung bình)
+        self.lastQueueChange = 0.0
+        self.lastQueueDepth = 0
+        self.hddInflight = 0
+        self.maxHddInflight = 0
+        self.startTime = 0.0
+        self.endTime = 0.0
+
+    def now(self):
+        return asyncio.get_running_loop().time()
+
+    def track_queue(self):
+        """Cập nhật độ dài hàng đợi (max và trung bình theo thời gian)"""
+        now = self.now()
+        self.queueDepthArea += self.lastQueueDepth * (now - self.lastQueueChange)
+        self.lastQueueChange = now
+        self.lastQueueDepth = self.queue.qsize()
+        self.maxQueueDepth = max(self.maxQueueDepth, self.lastQueueDepth)
+
+    def start(self):
+        self.startTime = self.lastQueueChange = self.now()
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.workerCount)]
+
+    async def stop(self):
+        await self.queue.join()
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.endTime = self.now()
+
+    async def submit(self, op, blockID, value=None):
+        """Client gửi request; chờ khi hàng đợi đầy, trả về dữ liệu (R) hoặc None (W)"""
+        request = Request(op, blockID, value, self.now())
+        await self.queue.put(request)
+        self.track_queue()
+        return await request.done
+
+    async def worker(self):
+        while True:
+            request = await self.queue.get()
+            self.track_queue()
+            try:
+                if request.op == 'R':
+                    result = await self.read(request.blockID)
+                else:
+                    result = await self.write(request.blockID, request.value)
+                latency = (self.now() - request.submitted) * 1000
+                self.completed += 1
+                self.latencies.append(latency)
+                write_through.record_latency(self.system, latency)
+                request.done.set_result(result)
+            except Exception as exc:
+                request.done.set_exception(exc)
+            finally:
+                self.queue.task_done()
+
+    async def device_io(self, slots, latency_ms, hdd=False):
+        """Chiếm một slot của thiết bị trong latency_ms (thời gian ảo)"""
+        async with slots:
+            if hdd:
+                self.hddInflight += 1
+                self.maxHddInflight = max(self.maxHddInflight, self.hddInflight)
+            try:
+                await asyncio.sleep(latency_ms / 1000)
+            finally:
+                if hdd:
+                    self.hddInflight -= 1
+
+    async def read(self, blockID):
+        system = self.system
+        system.tick()
+        cache_index = write_through.find_in_cache(system, blockID)
+
+        if cache_index != -1:
+            # ===== CACHE HIT =====
+            system.cacheHits += 1
+            system.ssdCache[cache_index].timestamp = system.currentTime
+            system.totalReadTime += SSD_READ_LATENCY
+            data = system.ssdCache[cache_index].data  # Slot có thể bị thay trong lúc chờ SSD
+            await self.device_io(self.ssdSlots, SSD_READ_LATENCY)
+            return data
+
+        system.cacheMisses += 1
+
+        if blockID in self.inflight:
+            # ===== MISS ĐÃ CÓ NGƯỜI ĐỌC HDD → GỘP =====
+            self.coalescedReads += 1
+            return await asyncio.shield(self.inflight[blockID])
+
+        # ===== CACHE MISS =====
+        system.hddReadCount += 1
+        system.totalReadTime += HDD_READ_LATENCY
+        pending = asyncio.get_running_loop().create_future()
+        self.inflight[blockID] = pending
+        try:
+            await self.device_io(self.hddSlots, HDD_READ_LATENCY, hdd=True)
+            data = system.hdd[blockID].data
+
+            # Đưa vào cache khi dữ liệu về (block có thể đã được nạp trong lúc chờ)
+            if write_through.find_in_cache(system, blockID) == -1:
+                victim_index = write_through.find_victim(system)
+                write_through.load_to_cache(system, blockID, victim_index)
+            pending.set_result(data)
+            return data
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        finally:
+            del self.inflight[blockID]
+
+    async def write(self, blockID, value):
+        # Chờ read miss cùng block đang bay để không bị dữ liệu cũ ghi đè
+        if blockID in self.inflight:
+            await asyncio.gather(self.inflight[blockID], return_exceptions=True)
+
+        # Cập nhật trạng thái cache/HDD như đường tuần tự, rồi chiếm thiết bị: SSD trước, HDD sau
+        write_through.cache_write_through(self.system, blockID, value)
+        await self.device_io(self.ssdSlots, SSD_WRITE_LATENCY)
+        await self.device_io(self.hddSlots, HDD_WRITE_LATENCY, hdd=True)
+
+
+# ============================================================================
+# 4. CLIENT VÀ CHẠY MÔ PHỎNG
+# ============================================================================
+async def client(frontend, operations):
+    """Client vòng kín: gửi lần lượt từng request, chờ xong mới gửi tiếp"""
+    for op, blockID, value in operations:
+        if op in ('R', 'W'):
+            await frontend.submit(op, blockID, value)
+
+
+def split_clients(traces, clients_per_trace=CLIENTS_PER_TRACE):
+    """Chia mỗi workload xen kẽ cho nhiều client: client i nhận các operation i, i+k, i+2k..."""
+    clients = []
+    for name, ops in traces:
+        for i in range(clients_per_trace):
+            if ops[i::clients_per_trace]:
+                clients.append((f"{name}#{i}", ops[i::clients_per_trace]))
+    return clients
+
+
+async def serve(clients, queue_size, hdd_concurrency, ssd_concurrency, workers):
+    frontend = AsyncCacheFrontend(write_through.StorageSystem(), queue_size,
+                                  hdd_concurrency, ssd_concurrency, workers)
+    frontend.start()
+    await asyncio.gather(*(client(frontend, ops) for _, ops in clients))
+    await frontend.stop()
+    return frontend
+
+
+def run_async(traces, queue_size=QUEUE_SIZE, hdd_concurrency=HDD_CONCURRENCY,
+              ssd_concurrency=SSD_CONCURRENCY, workers=WORKERS, clients_per_trace=CLIENTS_PER_TRACE):
+    """Chạy các client đồng thời trên đồng hồ ảo, trả về AsyncCacheFrontend"""
+    clients = split_clients(traces, clients_per_trace)
+    loop = VirtualTimeLoop()
+    try:
+        return loop.run_until_complete(serve(clients, queue_size, hdd_concurrency, ssd_concurrency, workers))
+    finally:
+        loop.close()
+
+
+def merge_round_robin(traces):
+    """Xen kẽ round-robin các workload trên cùng không gian block (khác interleave_workloads không dịch vùng HDD)"""
+    merged = []
+    longest = max((len(ops) for _, ops in traces), default=0)
+    for i in range(longest):
+        for _, ops in traces:
+            if i < len(ops):
+                merged.append(ops[i])
+    return merged
+
+
+def run_serial(traces, clients_per_trace=CLIENTS_PER_TRACE):
+    """Đường tuần tự tham chiếu: cùng các client, xử lý từng request một qua execute_workload"""
+    system = write_through.StorageSystem()
+    write_through.execute_workload(system, merge_round_robin(split_clients(traces, clients_per_trace)))
+    return system
+
+
+# ============================================================================
+# 5. THỐNG KÊ VÀ SO SÁNH
+# ============================================================================
+def percentile(values, pct):
+    """Phân vị pct (0-100) theo nearest-rank"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[rank - 1]
+
+
+def hit_rate(system):
+    total = system.cacheHits + system.cacheMisses
+    return (system.cacheHits / total * 100) if total > 0 else 0
+
+
+def histogram_values(histogram):
+    values = []
+    for latency, count in sorted(histogram.items()):
+        values.extend([latency] * count)
+    return values
+
+
+def serial_metrics(system):
+    """Đường tuần tự: request chạy nối tiếp nên makespan là tổng latency, không có hàng đợi"""
+    latencies = histogram_values(system.latencyHistogram)
+    makespan = system.totalReadTime + system.totalWriteTime
+    return {
+        'requests': len(latencies),
+        'makespan': makespan,
+        'throughput': len(latencies) / makespan * 1000 if makespan > 0 else 0,
+        'avg_latency': makespan / len(latencies) if latencies else 0,
+        'p99_latency': percentile(latencies, 99),
+        'max_queue': None,
+        'avg_queue': None,
+        'hdd_reads': system.hddReadCount,
+        'coalesced': 0,
+        'hit_rate': hit_rate(system),
+    }
+
+
+def async_metrics(frontend):
+    """Số liệu front-end bất đồng bộ; latency là thời gian phản hồi (gồm chờ hàng đợi và chờ thiết bị)"""
+    makespan = (frontend.endTime - frontend.startTime) * 1000
+    elapsed = frontend.endTime - frontend.startTime
+    return {
+        'requests': frontend.completed,
+        'makespan': makespan,
+        'throughput': frontend.completed / makespan * 1000 if makespan > 0 else 0,
+        'avg_latency': sum(frontend.latencies) / len(frontend.latencies) if frontend.latencies else 0,
+        'p99_latency': percentile(frontend.latencies, 99),
+        'max_queue': frontend.maxQueueDepth,
+        'avg_queue': frontend.queueDepthArea / elapsed if elapsed > 0 else 0,
+        'hdd_reads': frontend.system.hddReadCount,
+        'coalesced': frontend.coalescedReads,
+        'hit_rate': hit_rate(frontend.system),
+    }
+
+
+def compare_serial_async(traces, queue_size=QUEUE_SIZE, hdd_concurrency=HDD_CONCURRENCY,
+                         ssd_concurrency=SSD_CONCURRENCY, workers=WORKERS, clients_per_trace=CLIENTS_PER_TRACE):
+    """So sánh đường tuần tự với front-end asyncio trên cùng các workload"""
+    serial = serial_metrics(run_serial(traces, clients_per_trace))
+    frontend = run_async(traces, queue_size, hdd_concurrency, ssd_concurrency, workers, clients_per_trace)
+    concurrent = async_metrics(frontend)
+
+    print(f"\n{'=' * 70}")
+    print(f"TUẦN TỰ vs ASYNCIO ({len(split_clients(traces, clients_per_trace))} client, queue={queue_size}, "
+          f"HDD={hdd_concurrency}, SSD={ssd_concurrency}, workers={workers})")
+    print(f"{'=' * 70}")
+    print(f"{'Chỉ số':<28} {'Tuần tự':>18} {'Asyncio':>18}")
+    print("-" * 70)
+
+    rows = [
+        ("Số request", 'requests', "{:,}"),
+        ("Makespan (ms)", 'makespan', "{:.2f}"),
+        ("Throughput (req/s)", 'throughput', "{:.1f}"),
+        ("Latency TB (ms)", 'avg_latency', "{:.2f}"),
+        ("Latency p99 (ms)", 'p99_latency', "{:.2f}"),
+        ("Hàng đợi max", 'max_queue', "{:,}"),
+        ("Hàng đợi TB", 'avg_queue', "{:.2f}"),
+        ("Hit rate (%)", 'hit_rate', "{:.2f}"),
+        ("Số lần đọc HDD", 'hdd_reads', "{:,}"),
+        ("Đọc HDD được gộp", 'coalesced', "{:,}"),
+    ]
+    for label, key, fmt in rows:
+        cells = [fmt.format(m[key]) if m[key] is not None else "-" for m in (serial, concurrent)]
+        print(f"{label:<28} {cells[0]:>18} {cells[1]:>18}")
+    print("=" * 70)
+    print("  Latency tuần tự là thời gian phục vụ; latency asyncio gồm cả thời gian chờ hàng đợi/thiết bị")
+
+    speedup = serial['makespan'] / concurrent['makespan'] if concurrent['makespan'] > 0 else 0
+    saved = serial['hdd_reads'] - concurrent['hdd_reads']
+    print(f"\n  Tăng tốc throughput: {speedup:.2f}x")
+    print(f"  HDD I/O đồng thời tối đa: {frontend.maxHddInflight} / {hdd_concurrency}")
+    print(f"  Đọc HDD tiết kiệm so với tuần tự: {saved:,} "
+          f"(trong đó {concurrent['coalesced']:,} nhờ gộp miss cùng block)")
+    return serial, concurrent
+
+
+def sweep_hdd_concurrency(traces, levels=(1, 2, 4, 8), queue_size=QUEUE_SIZE):
+    """Throughput theo số I/O HDD đồng thời cho phép"""
+    print(f"\n{'=' * 70}")
+    print("THROUGHPUT THEO SỐ I/O HDD ĐỒNG THỜI")
+    print(f"{'=' * 70}")
+    print(f"{'HDD':>5} {'Makespan (ms)':>15} {'Req/s':>10} {'Latency TB':>12} {'Queue TB':>10} {'Gộp':>6}")
+    print("-" * 70)
+    rows = []
+    for level in levels:
+        m = async_metrics(run_async(traces, queue_size, hdd_concurrency=level))
+        rows.append((level, m))
+        print(f"{level:>5} {m['makespan']:>15.2f} {m['throughput']:>10.1f} "
+              f"{m['avg_latency']:>12.2f} {m['avg_queue']:>10.2f} {m['coalesced']:>6,}")
+    print("=" * 70)
+    return rows
+
+
+# ============================================================================
+# 6. CHƯƠNG TRÌNH CHÍNH
+# ============================================================================
+def main():
+    random.seed(42)  # Đảm bảo kết quả lặp lại được
+
+    print("=" * 70)
+    print("FRONT-END ASYNCIO CHO WRITE-THROUGH + LRU")
+    print("=" * 70)
+
+    configs = [
+        ("Random", "workload_random.txt", write_through.generate_random_workload, 100),
+        ("Sequential", "workload_sequential.txt", write_through.generate_sequential_workload, 150),
+        ("Locality", "workload_locality.txt", write_through.generate_locality_workload, 100),
+        ("Write-Heavy", "workload_write_heavy.txt", write_through.generate_write_heavy_workload, 100),
+    ]
+
+    traces = []
+    for name, filename, generate, num_ops in configs:
+        if not os.path.exists(filename):
+            generate(filename, num_ops)
+        ops = write_through.parse_workload(filename)
+        if ops:
+            traces.append((name, ops))
+
+    if not traces:
+        print("Không có workload để chạy")
+        return
+
+    compare_serial_async(traces)
+    sweep_hdd_concurrency(traces)
+
+    print("\n✓ HOÀN THÀNH MÔ PHỎNG ASYNCIO")
+
+
+if __name__ == "__main__":
+    main()
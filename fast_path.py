@@ -0,0 +1,444 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+import write_through
+from write_through import (
+    CACHE_SIZE,
+    HDD_CAPACITY,
+    HDD_READ_LATENCY,
+    HDD_WRITE_LATENCY,
+    SSD_READ_LATENCY,
+    SSD_WRITE_LATENCY,
+)
+
+# Bộ mô phỏng nhanh (NumPy) cho Write-Through + LRU
+# Tính hit/miss cho cả trace bằng reuse distance thay vì chạy từng operation
+# ============================================================================
+
+# ============================================================================
+# 1. MÃ OPERATION
+# ============================================================================
+OP_READ = 0
+OP_WRITE = 1
+OP_NOP = 2  # F, S: không ảnh hưởng Write-Through
+
+OP_CODES = {'R': OP_READ, 'W': OP_WRITE}
+
+
+# ============================================================================
+# 2. CHUYỂN WORKLOAD SANG MẢNG NUMPY
+# ============================================================================
+def operations_to_arrays(operations):
+    """Chuyển list (op, blockID, value) của parse_workload thành 3 mảng blocks, ops, values"""
+    n = len(operations)
+    blocks = np.zeros(n, dtype=np.int64)
+    ops = np.full(n, OP_NOP, dtype=np.int8)
+    values = np.zeros(n, dtype=np.int64)
+
+    for i, (op, blockID, value) in enumerate(operations):
+        ops[i] = OP_CODES.get(op, OP_NOP)
+        if blockID is not None:
+            blocks[i] = blockID
+        if value is not None:
+            values[i] = value
+
+    return blocks, ops, values
+
+
+# ============================================================================
+# 3. TÍNH HIT/MISS LRU THEO REUSE DISTANCE
+# ============================================================================
+def previous_access(blocks):
+    """Với mỗi truy cập, trả về vị trí truy cập trước đó tới cùng block (-1 nếu lần đầu)"""
+    n = len(blocks)
+    prev = np.full(n, -1, dtype=np.int64)
+    if n < 2:
+        return prev
+
+    # Khoá (block, vị trí) là duy nhất nên một lần sort thường thay được argsort ổn định
+    shift = (n - 1).bit_length()
+    keys = np.sort((blocks.astype(np.int64) << shift) | np.arange(n))
+    order = keys & ((1 << shift) - 1)
+    same = (keys[1:] ^ keys[:-1]) >> shift == 0
+
+    prev[order[1:]] = np.where(same, order[:-1], -1)
+    return prev
+
+
+def trailing_distinct(prev, width):
+    """Số block phân biệt trong `width` truy cập ngay trước mỗi vị trí i (cửa sổ [i - width, i))"""
+    n = len(prev)
+    distance = np.arange(n, dtype=np.int64) - prev  # Lần đầu: i + 1
+    distinct = np.zeros(n, dtype=np.int64)
+    np.cumsum(prev[:-1] < 0, out=distinct[1:])  # i <= width: mọi lần xuất hiện đầu tiên trước i
+
+    if width < n:
+        # Trượt cửa sổ: vị trí i - 1 thêm block mới nếu lần truy cập trước nằm ngoài cửa sổ,
+        # vị trí i - 1 - width mất block nếu block không được truy cập lại trong cửa sổ
+        revisited = np.zeros(n, dtype=bool)
+        revisited[prev[(prev >= 0) & (distance < width)]] = True
+        delta = (distance[width:n - 1] >= width).astype(np.int64)
+        delta -= ~revisited[:n - 1 - width]
+        distinct[width + 1:] = distinct[width] + np.cumsum(delta)
+
+    return distinct
+
+
+def count_below(values, starts, ends, limits):
+    """
+    Với mỗi truy vấn k, đếm số vị trí j trong [starts[k], ends[k]) có values[j] < limits[k].
+
+    Wavelet matrix: mỗi bit (từ cao xuống thấp) là một lần phân hoạch ổn định theo bit đó
+    cùng mảng đếm số bit 0 tích luỹ, xây một lần cho mọi truy vấn. Mọi truy vấn đi xuống
+    các tầng cùng lúc, tổng chi phí O((n + q) * số bit) thay vì sort lại ở mỗi cấp.
+    """
+    n = len(values)
+    top = int(max(values.max(initial=0), limits.max(initial=0)))
+    bits = max(1, top.bit_length())
+    # int32 giảm một nửa băng thông bộ nhớ, nhưng phải chứa được cả giá trị/ngưỡng lẫn chỉ số
+    dtype = np.int32 if max(top, n) < 2 ** 31 - 1 else np.int64
+
+    cur = values.astype(dtype)
+    nxt = np.empty_like(cur)
+    masked = np.empty(n, dtype=dtype)
+    zero = np.empty(n, dtype=bool)
+    one = np.empty(n, dtype=bool)
+    zeros = np.zeros(n + 1, dtype=dtype)  # zeros[x] = số bit 0 trong x vị trí đầu của tầng
+
+    lo = starts.astype(dtype)
+    hi = ends.astype(dtype)
+    limits = limits.astype(dtype)
+    counts = np.zeros(len(starts), dtype=dtype)
+    zeros_lo = np.empty_like(lo)
+    zeros_hi = np.empty_like(hi)
+    bit = np.empty_like(limits)
+
+    for level in range(bits - 1, -1, -1):
+        np.bitwise_and(cur, 1 << level, out=masked)
+        np.equal(masked, 0, out=zero)
+        np.logical_not(zero, out=one)
+        np.cumsum(zero, out=zeros[1:], dtype=dtype)
+        total0 = int(zeros[n])
+
+        # Phân hoạch ổn định: các giá trị có bit 0 lên trước
+        np.compress(zero, cur, out=nxt[:total0])
+        np.compress(one, cur, out=nxt[total0:])
+        cur, nxt = nxt, cur
+
+        np.take(zeros, lo, out=zeros_lo)
+        np.take(zeros, hi, out=zeros_hi)
+        np.right_shift(limits, level, out=bit)
+        np.bitwise_and(bit, 1, out=bit)
+
+        # Bit của ngưỡng là 1: mọi giá trị có bit 0 trong khoảng đều nhỏ hơn, đi tiếp sang nhánh 1;
+        # bit là 0: đi tiếp sang nhánh 0
+        counts += bit * (zeros_hi - zeros_lo)
+        lo += total0
+        lo -= 2 * zeros_lo
+        lo *= bit
+        lo += zeros_lo
+        hi += total0
+        hi -= 2 * zeros_hi
+        hi *= bit
+        hi += zeros_hi
+
+    return counts.astype(np.int64)
+
+
+def distinct_in_windows(prev, starts, ends, span):
+    """
+    Số block phân biệt trong từng cửa sổ [starts, ends) dài không quá `span`:
+    đếm các vị trí j trong cửa sổ có prev[j] < start (lần xuất hiện đầu tiên trong cửa sổ).
+
+    Với cửa sổ không dài hơn span, kẹp prev[j] về j - span không đổi kết quả, nên giá trị được
+    lấy tương đối theo từng khối span vị trí và nằm trong [0, 2 * span): wavelet chỉ cần
+    log2(2 * span) tầng thay vì log2(n). Mỗi cửa sổ trải trên tối đa hai khối liền nhau.
+    """
+    n = len(prev)
+    positions = np.arange(n, dtype=np.int64)
+    values = np.maximum(prev, positions - span) - (positions // span - 1) * span
+
+    tile = starts // span
+    split = np.minimum((tile + 1) * span, ends)
+    counts = count_below(values,
+                         np.concatenate((starts, split)),
+                         np.concatenate((split, np.maximum(ends, split))),
+                         np.concatenate((starts - (tile - 1) * span, starts - tile * span)))
+    return counts[:len(starts)] + counts[len(starts):]
+
+
+def lru_hits(blocks, cache_size=CACHE_SIZE):
+    """
+    Xác định hit/miss của LRU fully-associative cho cả trace.
+
+    Truy cập i hit khi số block phân biệt giữa lần truy cập trước p và i nhỏ hơn
+    cache_size. Khoảng cách ngắn (i - p - 1 < cache_size) chắc chắn hit; các truy cập
+    còn lại được xét theo từng mức span (2, 16, 128... lần cache_size):
+    - cửa sổ không dài hơn span: đếm chính xác bằng distinct_in_windows
+    - cửa sổ dài hơn mà span truy cập cuối đã đủ cache_size block phân biệt: chắc chắn miss
+    - phần còn lại chuyển sang span lớn hơn
+    """
+    n = len(blocks)
+    prev = previous_access(blocks)
+    gap = np.arange(n, dtype=np.int64) - prev - 1
+
+    hit = (prev >= 0) & (gap < cache_size)
+    pending = np.flatnonzero((prev >= 0) & (gap >= cache_size))
+    span = max(2 * cache_size, 1)
+
+    while len(pending):
+        short = gap[pending] <= span
+        windows = pending[short]
+        if len(windows):
+            hit[windows] = distinct_in_windows(prev, prev[windows] + 1, windows, span) < cache_size
+
+        pending = pending[~short]
+        if len(pending):
+            pending = pending[trailing_distinct(prev, span)[pending] < cache_size]
+        span *= 8
+
+    return hit
+
+
+def stack_distances(blocks):
+    """Khoảng cách stack LRU của từng truy cập (số block phân biệt kể từ lần truy cập trước), -1 nếu lần đầu"""
+    prev = previous_access(blocks)
+    distances = np.full(len(blocks), -1, dtype=np.int64)
+
+    reused = np.flatnonzero(prev >= 0)
+    if len(reused):
+        span = max(int((reused - prev[reused]).max()), 1)
+        distances[reused] = distinct_in_windows(prev, prev[reused] + 1, reused, span)
+
+    return distances
+
+
+def miss_ratio_curve(blocks, cache_sizes):
+    """Miss ratio của LRU (tính trên mọi truy cập R/W) với từng kích thước cache, chỉ cần duyệt trace một lần"""
+    distances = stack_distances(np.asarray(blocks, dtype=np.int64))
+    if len(distances) == 0:
+        return [0.0] * len(cache_sizes)
+
+    cold = int(np.count_nonzero(distances < 0))
+    reuse = np.sort(distances[distances >= 0])
+    # Miss khi khoảng cách stack >= kích thước cache
+    return [(cold + len(reuse) - int(np.searchsorted(reuse, size))) / len(distances) for size in cache_sizes]
+
+
+# ============================================================================
+# 4. MÔ PHỎNG NHANH WRITE-THROUGH
+# ============================================================================
+class ArrayHDD(write_through.LazyHDD):
+    """
+    LazyHDD lấy dữ liệu từ một mảng numpy (trạng thái HDD cuối trace của đường nhanh):
+    HDDEntry vẫn chỉ được tạo khi block được truy cập, thay vì ghi từng block vào HDD
+    """
+    def __init__(self, capacity, data):
+        super().__init__(capacity)
+        self.data = data
+
+    def __getitem__(self, blockID):
+        entry = self.blocks.get(blockID)
+        if entry is None:
+            entry = super().__getitem__(blockID)
+            entry.data = int(self.data[blockID])
+        return entry
+
+    def __iter__(self):
+        """Duyệt toàn bộ HDD (chỉ đọc), không cấp phát block chưa chạm tới"""
+        for blockID in range(self.capacity):
+            entry = self.blocks.get(blockID)
+            if entry is None:
+                entry = write_through.HDDEntry(blockID)
+                entry.data = int(self.data[blockID])
+            yield entry
+
+    def clear(self):
+        super().clear()
+        self.data[:] = 0
+
+
+def last_positions(blocks, capacity):
+    """Vị trí truy cập cuối cùng của từng block trong [0, capacity), -1 nếu không được truy cập"""
+    last = np.full(capacity, -1, dtype=np.int64)
+    np.maximum.at(last, blocks, np.arange(len(blocks), dtype=np.int64))
+    return last
+
+
+def simulate_write_through(blocks, ops, values=None, cache_size=CACHE_SIZE):
+    """
+    Mô phỏng Write-Through + LRU cho cả trace, trả về write_through.StorageSystem
+    với cùng các chỉ số như execute_workload. Chỉ hỗ trợ cache dùng chung (không partition).
+    """
+    blocks = np.asarray(blocks, dtype=np.int64)
+    ops = np.asarray(ops, dtype=np.int8)
+    values = np.zeros(len(blocks), dtype=np.int64) if values is None else np.asarray(values, dtype=np.int64)
+
+    # F/S không tick clock và không chạm cache
+    mask = ops != OP_NOP
+    blocks, ops, values = blocks[mask], ops[mask], values[mask]
+
+    if len(blocks) and (blocks.min() < 0 or blocks.max() >= HDD_CAPACITY):
+        raise ValueError(f"BlockID nằm ngoài HDD (0..{HDD_CAPACITY - 1})")
+
+    hit = lru_hits(blocks, cache_size)
+    reads = ops == OP_READ
+    writes = ops == OP_WRITE
+
+    read_hits = int(np.count_nonzero(hit & reads))
+    read_misses = int(np.count_nonzero(~hit & reads))
+    write_count = int(np.count_nonzero(writes))
+
+    system = write_through.StorageSystem()
+    system.cacheHits = read_hits
+    system.cacheMisses = read_misses
+    system.hddReadCount = int(np.count_nonzero(~hit))  # Read miss + write miss (write-allocate)
+    system.hddWriteCount = write_count
+    system.totalReadTime = read_hits * SSD_READ_LATENCY + read_misses * HDD_READ_LATENCY
+    system.totalWriteTime = write_count * (SSD_WRITE_LATENCY + HDD_WRITE_LATENCY)
+    system.currentTime = len(blocks)
+
+    # Histogram latency: mỗi loại request chỉ có một mức latency
+    for latency, count in ((SSD_READ_LATENCY, read_hits), (HDD_READ_LATENCY, read_misses),
+                           (SSD_WRITE_LATENCY + HDD_WRITE_LATENCY, write_count)):
+        if count:
+            key = round(latency, 6)
+            system.latencyHistogram[key] = system.latencyHistogram.get(key, 0) + count
+
+    # Trạng thái HDD: giá trị ghi cuối cùng của mỗi block
+    last_write = last_positions(np.compress(writes, blocks), HDD_CAPACITY)
+    written = np.flatnonzero(last_write >= 0)
+    data = np.zeros(HDD_CAPACITY, dtype=np.int64)
+    data[written] = np.compress(writes, values)[last_write[written]]
+    system.hdd = ArrayHDD(HDD_CAPACITY, data)
+
+    # Nội dung cache: cache_size block được truy cập gần nhất
+    last_access = last_positions(blocks, HDD_CAPACITY)
+    accessed = np.flatnonzero(last_access >= 0)
+    recent = accessed[np.argsort(last_access[accessed])[-cache_size:]] if cache_size > 0 else accessed[:0]
+    for blockID in recent.tolist():
+        entry = write_through.CacheEntry()
+        system.ssdCache.append(entry)
+        entry.blockID = blockID
+        entry.data = int(data[blockID])
+        entry.timestamp = int(last_access[blockID]) + 1
+        entry.valid = True
+
+    return system
+
+
+def execute_workload_fast(operations):
+    """Tương đương write_through.execute_workload trên một StorageSystem mới"""
+    return simulate_write_through(*operations_to_arrays(operations))
+
+
+# ============================================================================
+# 5. ĐỐI CHIẾU VỚI BỘ MÔ PHỎNG GỐC
+# ============================================================================
+def cross_check(operations):
+    """Chạy cả đường gốc (từng operation) và đường nhanh, trả về list các chỉ số lệch nhau"""
+    reference = write_through.StorageSystem()
+    write_through.execute_workload(reference, operations)
+    fast = execute_workload_fast(operations)
+
+    mismatches = []
+    for field in ('cacheHits', 'cacheMisses', 'hddReadCount', 'hddWriteCount', 'currentTime'):
+        if getattr(reference, field) != getattr(fast, field):
+            mismatches.append(f"{field}: {getattr(reference, field)} != {getattr(fast, field)}")
+
+    for field in ('totalReadTime', 'totalWriteTime'):
+        if not math.isclose(getattr(reference, field), getattr(fast, field), abs_tol=1e-6):
+            mismatches.append(f"{field}: {getattr(reference, field):.2f} != {getattr(fast, field):.2f}")
+
+    if reference.latencyHistogram != fast.latencyHistogram:
+        mismatches.append("latencyHistogram: phân bố latency khác nhau")
+
+    touched = reference.hdd.blocks.keys() | set(np.flatnonzero(fast.hdd.data).tolist())
+    if any(reference.hdd[blockID].data != fast.hdd[blockID].data for blockID in touched):
+        mismatches.append("hdd: dữ liệu HDD khác nhau")
+
+    cached_ref = {e.blockID for e in reference.ssdCache if e.valid}
+    cached_fast = {e.blockID for e in fast.ssdCache if e.valid}
+    if cached_ref != cached_fast:
+        mismatches.append(f"ssdCache: {len(cached_ref ^ cached_fast)} block khác nhau")
+
+    return mismatches
+
+
+def benchmark(name, operations, repeat=5):
+    """Đối chiếu kết quả và so sánh thời gian chạy giữa đường gốc và đường nhanh"""
+    start = time.perf_counter()
+    reference = write_through.StorageSystem()
+    write_through.execute_workload(reference, operations)
+    ref_time = time.perf_counter() - start
+
+    # Đường nhanh chỉ vài ms nên dễ nhiễu: lấy lần chạy nhanh nhất trong `repeat` lần
+    arrays = operations_to_arrays(operations)
+    fast_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        simulate_write_through(*arrays)
+        fast_time = min(fast_time, time.perf_counter() - start)
+
+    mismatches = cross_check(operations)
+    status = "KHỚP" if not mismatches else "LỆCH: " + "; ".join(mismatches)
+    speedup = ref_time / fast_time if fast_time > 0 else float('inf')
+    print(f"{name:<25} {len(operations):>9,}   {ref_time * 1000:>10.2f}   {fast_time * 1000:>10.2f}   {speedup:>8.1f}x   {status}")
+    return mismatches
+
+
+def generate_locality_trace(num_ops, seed=42):
+    """Sinh trace lớn có tính cục bộ (80% truy cập vào 200 block nóng) để đo tốc độ"""
+    rng = np.random.default_rng(seed)
+    hot = rng.integers(0, 200, num_ops)
+    cold = rng.integers(0, HDD_CAPACITY, num_ops)
+    blocks = np.where(rng.random(num_ops) < 0.8, hot, cold)
+    is_read = rng.random(num_ops) < 0.7
+    values = rng.integers(1, 1000, num_ops)
+    return [('R', b, None) if r else ('W', b, v)
+            for b, r, v in zip(blocks.tolist(), is_read.tolist(), values.tolist())]
+
+
+# ============================================================================
+# 6. CHƯƠNG TRÌNH CHÍNH
+# ============================================================================
+def main():
+    print("=" * 110)
+    print("MÔ PHỎNG NHANH WRITE-THROUGH (NUMPY) - ĐỐI CHIẾU VỚI BỘ MÔ PHỎNG GỐC")
+    print("=" * 110)
+
+    files = sys.argv[1:] or [
+        "workload_random.txt",
+        "workload_sequential.txt",
+        "workload_locality.txt",
+        "workload_write_heavy.txt",
+    ]
+
+    traces = []
+    for filename in files:
+        if os.path.exists(filename):
+            traces.append((filename, write_through.parse_workload(filename)))
+    traces.append(("locality-50k (sinh)", generate_locality_trace(50000)))
+    traces.append(("locality-200k (sinh)", generate_locality_trace(200000)))
+
+    print(f"\n{'Workload':<25} {'Số ops':>9}   {'Gốc (ms)':>10}   {'Nhanh (ms)':>10}   {'Tăng tốc':>9}   Kết quả")
+    print("-" * 110)
+
+    failed = 0
+    for name, ops in traces:
+        if benchmark(name, ops):
+            failed += 1
+
+    print(f"\n{'=' * 110}")
+    if failed:
+        print(f"✗ {failed} workload có kết quả lệch")
+    else:
+        print("✓ ĐƯỜNG NHANH KHỚP VỚI BỘ MÔ PHỎNG GỐC")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+try:
+    import pandas as pd  # Tuỳ chọn: lưu/đọc bảng dạng Parquet
+except ImportError:
+    pd = None
+
+# Kho kết quả mô phỏng và công cụ báo cáo
+# Mỗi lần chạy được lưu vào results/<run_id>/ gồm 3 bảng dạng cột:
+#   runs     - cấu hình, chính sách, workload và các chỉ số
+#   latency  - histogram latency từng request (vẽ latency CDF)
+#   mrc      - miss-ratio curve của LRU theo kích thước cache
+# ============================================================================
+
+# ============================================================================
+# 1. THAM SỐ CẤU HÌNH
+# ============================================================================
+RESULTS_DIR = "results"
+SUMMARY_TABLE = "summary"  # Bảng tổng hợp (CSV), cập nhật tăng dần theo run mới
+TABLES = ("runs", "latency", "mrc")
+CONFIG_KEYS = [
+    "BLOCK_SIZE", "HDD_CAPACITY", "CACHE_SIZE",
+    "HDD_READ_LATENCY", "HDD_WRITE_LATENCY", "SSD_READ_LATENCY", "SSD_WRITE_LATENCY",
+]
+MRC_SIZES = [2 ** k for k in range(13)]  # 1 .. 4096 block
+REGRESSION_THRESHOLD = 0.05  # Thay đổi xấu hơn 5% được coi là hồi quy
+
+# Chỉ số so sánh khi diff: (tên cột, True nếu giá trị lớn hơn là tốt hơn)
+DIFF_METRICS = [
+    ("hit_rate", True),
+    ("hdd_reads", False),
+    ("hdd_writes", False),
+    ("read_time_ms", False),
+    ("write_time_ms", False),
+    ("total_time_ms", False),
+    ("avg_latency_ms", False),
+    ("p99_latency_ms", False),
+]
+
+
+# ============================================================================
+# 2. TRÍCH XUẤT CHỈ SỐ TỪ STORAGESYSTEM
+# ============================================================================
+def module_config(namespace):
+    """Lấy các tham số cấu hình (BLOCK_SIZE, CACHE_SIZE, ...) từ globals() của bộ mô phỏng"""
+    return {key.lower(): namespace[key] for key in CONFIG_KEYS if key in namespace}
+
+
+def system_metrics(system):
+    """Chỉ số của một StorageSystem (Write-Through hoặc Write-Back)"""
+    total_access = system.cacheHits + system.cacheMisses
+    hit_rate = (system.cacheHits / total_access * 100) if total_access > 0 else 0
+
+    # Write-Through dùng totalReadTime/totalWriteTime, Write-Back dùng totalReadLatency/totalWriteLatency
+    read_time = getattr(system, 'totalReadTime', getattr(system, 'totalReadLatency', 0.0))
+    write_time = getattr(system, 'totalWriteTime', getattr(system, 'totalWriteLatency', 0.0))
+
+    return {
+        "cache_hits": system.cacheHits,
+        "cache_misses": system.cacheMisses,
+        "hit_rate": hit_rate,
+        "miss_rate": 100 - hit_rate if total_access > 0 else 0,
+        "hdd_reads": system.hddReadCount,
+        "hdd_writes": system.hddWriteCount,
+        "read_time_ms": read_time,
+        "write_time_ms": write_time,
+        "total_time_ms": read_time + write_time,
+    }
+
+
+def latency_percentile(histogram, q):
+    """Percentile q (0..100) từ list (latency, count) đã sắp xếp theo latency"""
+    total = sum(count for _, count in histogram)
+    if total == 0:
+        return 0.0
+    target = q / 100 * total
+    seen = 0
+    for latency, count in histogram:
+        seen += count
+        if seen >= target:
+            return latency
+    return histogram[-1][0]
+
+
+def trace_blocks(operations):
+    """Dãy blockID của các operation R/W (đầu vào cho miss-ratio curve)"""
+    return [blockID for op, blockID, _ in operations if op in ('R', 'W')]
+
+
+# ============================================================================
+# 3. LƯU VÀ ĐỌC BẢNG
+# ============================================================================
+def to_number(value):
+    """Chuyển chuỗi đọc từ CSV về int/float nếu được"""
+    if not isinstance(value, str):
+        return value
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def write_table(path, rows, fmt='csv'):
+    """Ghi list dict thành bảng dạng cột (<path>.csv hoặc <path>.parquet)"""
+    if fmt == 'parquet':
+        if pd is None:
+            raise ImportError("Cần pandas + pyarrow để ghi Parquet")
+        pd.DataFrame(rows).to_parquet(path + ".parquet", index=False)
+        return
+
+    columns = list(rows[0].keys()) if rows else []
+    with open(path + ".csv", 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_table(path):
+    """Đọc bảng <path>.parquet hoặc <path>.csv, trả về list dict ([] nếu không có)"""
+    if os.path.exists(path + ".parquet"):
+        if pd is None:
+            raise ImportError("Cần pandas + pyarrow để đọc Parquet")
+        return pd.read_parquet(path + ".parquet").to_dict('records')
+
+    if not os.path.exists(path + ".csv"):
+        return []
+    with open(path + ".csv", 'r', newline='', encoding='utf-8') as f:
+        return [{k: to_number(v) for k, v in row.items()} for row in csv.DictReader(f)]
+
+
+def new_run_id(policy, results_dir):
+    """run_id dạng <thời gian>-<chính sách>, thêm hậu tố nếu trùng"""
+    base = f"{time.strftime('%Y%m%d-%H%M%S')}-{policy}"
+    run_id, suffix = base, 1
+    while os.path.exists(os.path.join(results_dir, run_id)):
+        suffix += 1
+        run_id = f"{base}-{suffix}"
+    return run_id
+
+
+def save_run(policy, config, results, traces=None, results_dir=RESULTS_DIR, fmt='csv'):
+    """
+    Lưu một lần chạy vào kho kết quả, trả về run_id.
+
+    config:  dict tham số (xem module_config)
+    results: list (workload, StorageSystem) như trong main() của bộ mô phỏng
+    traces:  list (workload, operations) để tính miss-ratio curve (cần NumPy)
+    """
+    run_id = new_run_id(policy, results_dir)
+    run_dir = os.path.join(results_dir, run_id)
+    os.makedirs(run_dir)
+    created = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    runs, latency, mrc = [], [], []
+    for workload, system in results:
+        row = {"run_id": run_id, "created": created, "policy": policy, "workload": workload}
+        row.update(config)
+        row.update(system_metrics(system))
+        runs.append(row)
+
+        for value, count in sorted(system.latencyHistogram.items()):
+            latency.append({"run_id": run_id, "policy": policy, "workload": workload,
+                            "latency_ms": value, "count": count})
+
+    try:
+        import fast_path  # Cần NumPy
+    except ImportError:
+        fast_path = None
+
+    if fast_path is not None:
+        for workload, operations in traces or []:
+            ratios = fast_path.miss_ratio_curve(trace_blocks(operations), MRC_SIZES)
+            for size, ratio in zip(MRC_SIZES, ratios):
+                mrc.append({"run_id": run_id, "policy": policy, "workload": workload,
+                            "cache_size": size, "miss_ratio": ratio})
+
+    for name, rows in zip(TABLES, (runs, latency, mrc)):
+        if rows:
+            write_table(os.path.join(run_dir, name), rows, fmt)
+
+    return run_id
+
+
+# ============================================================================
+# 4. TỔNG HỢP TĂNG DẦN
+# ============================================================================
+def list_runs(results_dir=RESULTS_DIR):
+    """Danh sách run_id trong kho, theo thứ tự thời gian"""
+    if not os.path.isdir(results_dir):
+        return []
+    return sorted(name for name in os.listdir(results_dir)
+                  if any(os.path.exists(os.path.join(results_dir, name, "runs" + ext))
+                         for ext in (".csv", ".parquet")))
+
+
+def summarize_run(run_id, results_dir=RESULTS_DIR):
+    """Các dòng tổng hợp của một run: chỉ số gốc + latency trung bình/percentile"""
+    run_dir = os.path.join(results_dir, run_id)
+    latency_rows = read_table(os.path.join(run_dir, "latency"))
+
+    rows = []
+    for row in read_table(os.path.join(run_dir, "runs")):
+        histogram = sorted((r["latency_ms"], r["count"]) for r in latency_rows
+                           if r["policy"] == row["policy"] and r["workload"] == row["workload"])
+        requests = sum(count for _, count in histogram)
+
+        summary = dict(row)
+        summary["requests"] = requests
+        summary["avg_latency_ms"] = (sum(l * c for l, c in histogram) / requests) if requests > 0 else 0
+        summary["p50_latency_ms"] = latency_percentile(histogram, 50)
+        summary["p95_latency_ms"] = latency_percentile(histogram, 95)
+        summary["p99_latency_ms"] = latency_percentile(histogram, 99)
+        rows.append(summary)
+    return rows
+
+
+def update_summary(results_dir=RESULTS_DIR):
+    """Cập nhật bảng tổng hợp: chỉ tính các run chưa có trong bảng, trả về toàn bộ bảng"""
+    path = os.path.join(results_dir, SUMMARY_TABLE)
+    summary = read_table(path)
+    done = {row["run_id"] for row in summary}
+
+    new_rows = []
+    for run_id in list_runs(results_dir):
+        if run_id not in done:
+            new_rows.extend(summarize_run(run_id, results_dir))
+
+    if new_rows:
+        # Cấu hình có thể khác nhau giữa các run → hợp nhất tập cột
+        columns = list(summary[0].keys()) if summary else []
+        for row in new_rows:
+            columns.extend(k for k in row if k not in columns)
+        summary.extend(new_rows)
+        with open(path + ".csv", 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, restval='')
+            writer.writeheader()
+            writer.writerows(summary)
+
+    return summary
+
+
+# ============================================================================
+# 5. SO SÁNH HAI LẦN CHẠY
+# ============================================================================
+def diff_runs(run_a, run_b, results_dir=RESULTS_DIR, threshold=REGRESSION_THRESHOLD):
+    """In chênh lệch chỉ số giữa hai run, trả về list hồi quy (policy, workload, metric)"""
+    summary = update_summary(results_dir)
+    # Mỗi run chỉ có một chính sách → ghép theo workload (cho phép so sánh khác chính sách)
+    rows_a = {r["workload"]: r for r in summary if r["run_id"] == run_a}
+    rows_b = {r["workload"]: r for r in summary if r["run_id"] == run_b}
+    if not rows_a or not rows_b:
+        missing = run_a if not rows_a else run_b
+        print(f"✗ Không tìm thấy run: {missing}")
+        return []
+
+    print(f"\n{'=' * 110}")
+    print(f"SO SÁNH: {run_a}  →  {run_b}")
+    print(f"{'=' * 110}")
+
+    regressions = []
+    for key in sorted(rows_a.keys() & rows_b.keys()):
+        a, b = rows_a[key], rows_b[key]
+        print(f"\n{key} ({a['policy']} → {b['policy']})")
+        print(f"  {'Chỉ số':<20} {'Trước':>14} {'Sau':>14} {'Δ':>14} {'Δ (%)':>10}")
+        print("  " + "-" * 76)
+
+        for metric, higher_is_better in DIFF_METRICS:
+            before, after = float(a[metric]), float(b[metric])
+            delta = after - before
+            change = (delta / before) if before else (0.0 if delta == 0 else float('inf'))
+            worse = -change if higher_is_better else change
+
+            flag = ""
+            if worse > threshold:
+                flag = "  ⚠ hồi quy"
+                regressions.append((b["policy"], key, metric))
+            print(f"  {metric:<20} {before:>14.2f} {after:>14.2f} {delta:>+14.2f} {change * 100:>+9.2f}%{flag}")
+
+    only = sorted(rows_a.keys() ^ rows_b.keys())
+    if only:
+        print(f"\nChỉ có ở một run: {', '.join(only)}")
+
+    print(f"\n{'=' * 110}")
+    print(f"{len(regressions)} chỉ số hồi quy (ngưỡng {threshold * 100:.0f}%)")
+    return regressions
+
+
+# ============================================================================
+# 6. BIỂU ĐỒ
+# ============================================================================
+def plot_run(run_id, results_dir=RESULTS_DIR, out_dir=None):
+    """Vẽ miss-ratio curve và latency CDF của một run, trả về list file PNG"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("✗ Cần matplotlib để vẽ biểu đồ")
+        return []
+
+    run_dir = os.path.join(results_dir, run_id)
+    out_dir = out_dir or run_dir
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+
+    mrc_rows = read_table(os.path.join(run_dir, "mrc"))
+    if mrc_rows:
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for key in sorted({(r["policy"], r["workload"]) for r in mrc_rows}):
+            points = sorted((r["cache_size"], r["miss_ratio"]) for r in mrc_rows
+                            if (r["policy"], r["workload"]) == key)
+            ax.plot([p[0] for p in points], [p[1] for p in points], marker='o', label=f"{key[0]} / {key[1]}")
+        ax.set_xscale('log', base=2)
+        ax.set_xlabel("Kích thước cache (block)")
+        ax.set_ylabel("Miss ratio")
+        ax.set_title(f"Miss-ratio curve (LRU) - {run_id}")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        files.append(os.path.join(out_dir, f"{run_id}_mrc.png"))
+        fig.savefig(files[-1], dpi=120, bbox_inches='tight')
+        plt.close(fig)
+
+    latency_rows = read_table(os.path.join(run_dir, "latency"))
+    if latency_rows:
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for key in sorted({(r["policy"], r["workload"]) for r in latency_rows}):
+            histogram = sorted((r["latency_ms"], r["count"]) for r in latency_rows
+                               if (r["policy"], r["workload"]) == key)
+            total = sum(count for _, count in histogram)
+            xs, ys, seen = [], [], 0
+            for latency, count in histogram:
+                seen += count
+                xs.append(latency)
+                ys.append(seen / total)
+            ax.step(xs, ys, where='post', label=f"{key[0]} / {key[1]}")
+        ax.set_xscale('log')
+        ax.set_xlabel("Latency (ms)")
+        ax.set_ylabel("Tỉ lệ request")
+        ax.set_title(f"Latency CDF - {run_id}")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        files.append(os.path.join(out_dir, f"{run_id}_latency_cdf.png"))
+        fig.savefig(files[-1], dpi=120, bbox_inches='tight')
+        plt.close(fig)
+
+    return files
+
+
+# ============================================================================
+# 7. CHƯƠNG TRÌNH CHÍNH
+# ============================================================================
+def print_summary(summary):
+    """In bảng tổng hợp tất cả các run"""
+    print(f"\n{'=' * 130}")
+    print(f"TỔNG HỢP KẾT QUẢ ({len({r['run_id'] for r in summary})} run)")
+    print(f"{'=' * 130}")
+    print(f"\n{'Run':<32} {'Chính sách':<15} {'Workload':<13} {'Hit rate':>9} {'HDD R':>7} {'HDD W':>7} "
+          f"{'Tổng (ms)':>11} {'TB (ms)':>9} {'p99 (ms)':>9}")
+    print("-" * 130)
+    for r in summary:
+        print(f"{r['run_id']:<32} {r['policy']:<15} {r['workload']:<13} {float(r['hit_rate']):>8.2f}% "
+              f"{int(r['hdd_reads']):>7} {int(r['hdd_writes']):>7} {float(r['total_time_ms']):>11.2f} "
+              f"{float(r['avg_latency_ms']):>9.2f} {float(r['p99_latency_ms']):>9.2f}")
+    print(f"\n{'=' * 130}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Báo cáo kết quả mô phỏng SSD cache")
+    parser.add_argument("--dir", default=RESULTS_DIR, help="Thư mục kho kết quả")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Liệt kê các run")
+    commands.add_parser("summary", help="Cập nhật và in bảng tổng hợp")
+
+    diff_parser = commands.add_parser("diff", help="So sánh hai run")
+    diff_parser.add_argument("run_a")
+    diff_parser.add_argument("run_b")
+    diff_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    plot_parser = commands.add_parser("plot", help="Vẽ miss-ratio curve và latency CDF")
+    plot_parser.add_argument("run_id")
+    plot_parser.add_argument("--out", default=None, help="Thư mục lưu ảnh")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for run_id in list_runs(args.dir):
+            print(run_id)
+    elif args.command == "summary":
+        print_summary(update_summary(args.dir))
+    elif args.command == "diff":
+        if diff_runs(args.run_a, args.run_b, args.dir, args.threshold):
+            sys.exit(1)
+    elif args.command == "plot":
+        for path in plot_run(args.run_id, args.dir, args.out):
+            print(f"✓ Lưu biểu đồ: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import time
 import os
 import sys
 import random
+import math
+import hashlib
 
 # Ghi hoãn lại (Write-Back) + LRU Eviction
 # Dirty Bit: Đánh dấu khi ghi, flush khi thay thế
@@ -17,6 +19,14 @@ HDD_WRITE_LATENCY = 10  # Trễ ghi HDD (ms)
 CACHE_SIZE = 128  # Số slot cache (SSD)
 SSD_READ_LATENCY = 0.1  # Trễ đọc SSD cache (ms)
 SSD_WRITE_LATENCY = 0.2  # Trễ ghi SSD cache (ms)
+JOURNAL_WRITE_LATENCY = 0.05  # Trễ ghi một bản ghi metadata journal trên SSD (ms)
+JOURNAL_REPLAY_LATENCY = 0.01  # Trễ replay một bản ghi journal khi khôi phục (ms)
+JOURNAL_MAX_ENTRIES = 1024  # Compact journal khi vượt ngưỡng này
+SLOT_GRANULARITY = 512  # Đơn vị cấp phát slot nén (bytes)
+DEDUP_METADATA_FACTOR = 4  # Cache dedup giữ tối đa CACHE_SIZE * hệ số này entry logic
+FINGERPRINT_LATENCY = 0.02  # CPU tính fingerprint một block (ms)
+COMPRESS_LATENCY = 0.05  # CPU nén một block (ms)
+DECOMPRESS_LATENCY = 0.02  # CPU giải nén một block (ms)
 
 
 # ============================================================================
@@ -30,19 +40,77 @@ class CacheEntry:
         self.timestamp = 0
         self.valid = False
         self.dirty = False  # [WRITE-BACK CORE]
+        self.fingerprint = None  # Fingerprint nội dung (chế độ dedup)
 
 
 class HDDEntry:
     def __init__(self, blockID):
         self.blockID = blockID
         self.data = 0
+        self.written = False  # False: data = 0 chỉ là giá trị mặc định, chưa biết nội dung thật
+
+
+class LazyHDD:
+    """
+    HDD cấp phát lười: chỉ tạo HDDEntry khi block được truy cập lần đầu,
+    block chưa chạm tới mang giá trị mặc định (data = 0)
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.blocks = {}  # blockID -> HDDEntry đã cấp phát
+
+    def __len__(self):
+        return self.capacity
+
+    def __getitem__(self, blockID):
+        entry = self.blocks.get(blockID)
+        if entry is None:
+            if not 0 <= blockID < self.capacity:
+                raise IndexError(f"Block {blockID} nằm ngoài HDD (0..{self.capacity - 1})")
+            entry = self.blocks[blockID] = HDDEntry(blockID)
+        return entry
+
+    def __iter__(self):
+        """Duyệt toàn bộ HDD (chỉ đọc): block chưa chạm tới trả về entry mặc định, không cấp phát"""
+        for blockID in range(self.capacity):
+            entry = self.blocks.get(blockID)
+            yield entry if entry is not None else HDDEntry(blockID)
+
+    def clear(self):
+        self.blocks.clear()
+
+
+class CrashReport:
+    """Kết quả một lần mô phỏng mất điện giữa trace"""
+    def __init__(self, crash_point, journal):
+        self.crashPoint = crash_point  # Số operation đã thực thi trước khi crash
+        self.journal = journal
+        self.ackedWrites = 0  # Số block đã được ack cho client
+        self.lostWrites = 0  # Số block đã ack nhưng HDD không khớp sau khôi phục
+        self.recoveredBlocks = 0  # Số block bẩn khôi phục được từ journal
+        self.recoveryTime = 0.0  # Thời gian khôi phục (ms)
+        self.writeLatency = 0.0  # Tổng thời gian write tới lúc crash (ms)
+        self.journalLatency = 0.0  # Phần chi phí do ghi journal (ms)
 
 
 class StorageSystem:
-    def __init__(self):
-        # Cấu trúc lưu trữ
-        self.ssdCache = [CacheEntry() for _ in range(CACHE_SIZE)]
-        self.hdd = [HDDEntry(i) for i in range(HDD_CAPACITY)]
+    def __init__(self, journal=False, dedup=False, compression_ratio=1.0):
+        # Cấu trúc lưu trữ (cấp phát lười: chi phí khởi tạo theo working set, không theo HDD_CAPACITY)
+        self.ssdCache = []  # CacheEntry được thêm khi cần slot mới (tối đa CACHE_SIZE)
+        self.hdd = LazyHDD(HDD_CAPACITY)
+
+        # Metadata journal bền vững trên SSD (sống sót khi mất điện)
+        self.journalEnabled = journal
+
+        # Cache content-addressed: dedup theo fingerprint, nén với tỉ lệ trung bình compression_ratio
+        self.dedup = dedup
+        self.compressionRatio = compression_ratio
+        self.reset()
+
+    def reset(self):
+        """Xoá dữ liệu và thống kê để dùng lại hệ thống cho lần chạy mới"""
+        self.ssdCache.clear()
+        self.hdd.clear()
 
         # Các biến đếm để tính toán chỉ số
         self.cacheHits = 0
@@ -57,6 +125,15 @@ class StorageSystem:
         self.hddWriteCount = 0  # Số lần truy cập HDD khi write (Flush)
 
         self.currentTime = 0  # Clock cho LRU timestamp
+        self.latencyHistogram = {}  # Latency một request (ms) -> số request
+
+        self.journal = []  # Bản ghi ('D', blockID, data) khi ghi bẩn, ('C', blockID, None) khi flush
+        self.journalLatency = 0.0  # Tổng chi phí ghi journal (đã gồm trong totalWriteLatency)
+
+        self.contentStore = {}  # fingerprint -> [kích thước slot (bytes), số entry tham chiếu]
+        self.usedBytes = 0  # Dung lượng SSD vật lý đang dùng (chế độ dedup)
+        self.logicalBlocks = 0  # Số block logic đang được cache (chế độ dedup)
+        self.cpuLatency = 0.0  # Chi phí CPU fingerprint/nén/giải nén (đã gồm trong latency)
 
     def tick(self):
         """Tăng thời gian hệ thống (cho LRU)"""
@@ -69,21 +146,32 @@ class StorageSystem:
 
 def find_in_cache(system, blockID):
     """Tìm block trong cache, trả về index hoặc -1 nếu không tìm thấy"""
-    for i in range(CACHE_SIZE):
+    for i in range(len(system.ssdCache)):
         if system.ssdCache[i].valid and system.ssdCache[i].blockID == blockID:
             return i
     return -1
 
 
+def find_free_slot(system, limit=CACHE_SIZE):
+    """Tìm slot trống, cấp phát CacheEntry mới nếu cache chưa đủ `limit` slot; -1 nếu đầy"""
+    for i in range(len(system.ssdCache)):
+        if not system.ssdCache[i].valid:
+            return i
+    if len(system.ssdCache) < limit:
+        system.ssdCache.append(CacheEntry())
+        return len(system.ssdCache) - 1
+    return -1
+
+
 def find_lru_victim(system):
     """Tìm entry có timestamp nhỏ nhất (LRU) hoặc slot trống"""
     min_timestamp = float('inf')
     victim_index = 0
 
     # Bước 1: Tìm slot trống
-    for i in range(CACHE_SIZE):
-        if not system.ssdCache[i].valid:
-            return i
+    free_index = find_free_slot(system)
+    if free_index != -1:
+        return free_index
 
     # Bước 2: Cache đầy → Tìm LRU (timestamp nhỏ nhất)
     for i in range(CACHE_SIZE):
@@ -94,6 +182,31 @@ def find_lru_victim(system):
     return victim_index
 
 
+def find_lru_entry(system, exclude=-1):
+    """Tìm entry hợp lệ có timestamp nhỏ nhất (bỏ qua `exclude`), -1 nếu không có"""
+    victim_index = -1
+    for i in range(len(system.ssdCache)):
+        entry = system.ssdCache[i]
+        if entry.valid and i != exclude:
+            if victim_index == -1 or entry.timestamp < system.ssdCache[victim_index].timestamp:
+                victim_index = i
+    return victim_index
+
+
+def find_victim(system):
+    """Chọn slot cho block mới: LRU theo số slot, hoặc theo dung lượng nếu bật dedup"""
+    if not system.dedup:
+        return find_lru_victim(system)
+
+    # Cache dedup: số entry logic chỉ bị giới hạn bởi metadata, dung lượng do store_content() quản lý
+    free_index = find_free_slot(system, CACHE_SIZE * DEDUP_METADATA_FACTOR)
+    if free_index != -1:
+        return free_index
+    victim_index = find_lru_entry(system)
+    evict_entry(system, victim_index)
+    return victim_index
+
+
 def flush_entry(system, index):
     """Ghi một entry dirty xuống HDD"""
     entry = system.ssdCache[index]
@@ -101,6 +214,7 @@ def flush_entry(system, index):
     if entry.valid and entry.dirty:
         # Ghi xuống HDD
         system.hdd[entry.blockID].data = entry.data
+        system.hdd[entry.blockID].written = True
 
         # Cộng latency (mô phỏng thời gian ghi HDD)
         system.totalWriteLatency += HDD_WRITE_LATENCY
@@ -111,6 +225,127 @@ def flush_entry(system, index):
         # Đánh dấu sạch
         entry.dirty = False
 
+        # Ghi nhận block đã sạch vào journal
+        system.totalWriteLatency += journal_append(system, 'C', entry.blockID, None)
+
+
+def replay_journal(journal):
+    """Replay journal, trả về dict blockID -> data của các block còn bẩn"""
+    dirty = {}
+    for kind, blockID, data in journal:
+        if kind == 'D':
+            dirty[blockID] = data
+        else:
+            dirty.pop(blockID, None)
+    return dirty
+
+
+def journal_append(system, kind, blockID, data):
+    """Ghi một bản ghi metadata vào journal, trả về latency phát sinh"""
+    if not system.journalEnabled:
+        return 0.0
+
+    system.journal.append((kind, blockID, data))
+    latency = JOURNAL_WRITE_LATENCY
+
+    # Journal đầy → compact, chỉ giữ lại các block còn bẩn
+    if len(system.journal) > JOURNAL_MAX_ENTRIES:
+        live = replay_journal(system.journal)
+        system.journal = [('D', b, d) for b, d in live.items()]
+        latency += len(system.journal) * JOURNAL_WRITE_LATENCY
+
+    system.journalLatency += latency
+    return latency
+
+
+def content_fingerprint(data):
+    """Fingerprint nội dung block, suy ra từ giá trị ghi (hoặc khoá ('hdd', blockID) của hdd_content)"""
+    return hashlib.sha1(repr(data).encode()).hexdigest()
+
+
+def hdd_content(system, blockID):
+    """
+    Nội dung dùng để fingerprint khi load block từ HDD lúc read miss. Block chưa từng được ghi
+    chỉ mang giá trị mặc định data = 0, không phải dữ liệu toàn số 0 thật, nên được coi là
+    nội dung riêng của block đó (không dedup với block khác)
+    """
+    entry = system.hdd[blockID]
+    return entry.data if entry.written else ('hdd', blockID)
+
+
+def compressed_size(system, fingerprint):
+    """
+    Kích thước slot (bytes) của nội dung sau khi nén, làm tròn lên SLOT_GRANULARITY.
+    Tỉ lệ nén của từng nội dung dao động quanh compressionRatio (suy ra từ fingerprint)
+    """
+    if system.compressionRatio <= 1:
+        return BLOCK_SIZE
+    spread = int(fingerprint[:8], 16) / 0xFFFFFFFF  # [0, 1]
+    ratio = max(1.0, 1 + (system.compressionRatio - 1) * (0.5 + spread))
+    return math.ceil(BLOCK_SIZE / ratio / SLOT_GRANULARITY) * SLOT_GRANULARITY
+
+
+def release_content(system, entry):
+    """Bỏ tham chiếu của entry tới nội dung, giải phóng slot khi không còn entry nào dùng"""
+    if entry.fingerprint is None:
+        return
+
+    record = system.contentStore[entry.fingerprint]
+    record[1] -= 1
+    if record[1] == 0:
+        system.usedBytes -= record[0]
+        del system.contentStore[entry.fingerprint]
+    system.logicalBlocks -= 1
+    entry.fingerprint = None
+
+
+def evict_entry(system, index):
+    """Loại entry khỏi cache dedup: flush nếu bẩn rồi trả lại dung lượng"""
+    flush_entry(system, index)
+    release_content(system, system.ssdCache[index])
+    system.ssdCache[index].valid = False
+
+
+def store_content(system, index, data):
+    """
+    Gắn nội dung `data` cho entry theo fingerprint. Nội dung đã có trong cache chỉ
+    tăng số tham chiếu; nội dung mới được nén và thay thế LRU tới khi đủ chỗ.
+    Trả về chi phí CPU (ms)
+    """
+    entry = system.ssdCache[index]
+    release_content(system, entry)
+
+    fingerprint = content_fingerprint(data)
+    latency = FINGERPRINT_LATENCY
+
+    if fingerprint not in system.contentStore:
+        size = compressed_size(system, fingerprint)
+        while system.usedBytes + size > CACHE_SIZE * BLOCK_SIZE:
+            victim_index = find_lru_entry(system, exclude=index)
+            if victim_index == -1:
+                break
+            evict_entry(system, victim_index)
+
+        system.contentStore[fingerprint] = [size, 0]
+        system.usedBytes += size
+        if system.compressionRatio > 1:
+            latency += COMPRESS_LATENCY
+
+    system.contentStore[fingerprint][1] += 1
+    system.logicalBlocks += 1
+    entry.fingerprint = fingerprint
+
+    system.cpuLatency += latency
+    return latency
+
+
+def content_read_latency(system):
+    """Chi phí CPU khi đọc hit (giải nén) trong cache dedup"""
+    if not system.dedup or system.compressionRatio <= 1:
+        return 0.0
+    system.cpuLatency += DECOMPRESS_LATENCY
+    return DECOMPRESS_LATENCY
+
 
 def load_to_cache(system, blockID, cache_index):
     """Load block từ HDD vào cache"""
@@ -140,6 +375,7 @@ def cache_read(system, blockID):
         system.ssdCache[cache_index].timestamp = system.currentTime
 
         latency = SSD_READ_LATENCY  # 0.1ms
+        latency += content_read_latency(system)
         system.totalReadLatency += latency
 
         return system.ssdCache[cache_index].data, latency
@@ -154,7 +390,7 @@ def cache_read(system, blockID):
         latency = HDD_READ_LATENCY  # 8ms
 
         # Tìm victim
-        victim_index = find_lru_victim(system)
+        victim_index = find_victim(system)
 
         # [WRITE-BACK KEY] Nếu victim bẩn → FLUSH trước khi ghi đè
         if system.ssdCache[victim_index].valid and system.ssdCache[victim_index].dirty:
@@ -163,6 +399,8 @@ def cache_read(system, blockID):
 
         # Load block mới từ HDD
         load_to_cache(system, blockID, victim_index)
+        if system.dedup:
+            latency += store_content(system, victim_index, hdd_content(system, blockID))
 
         system.totalReadLatency += latency
         return system.ssdCache[victim_index].data, latency
@@ -186,6 +424,8 @@ def cache_write(system, blockID, new_data):
         system.ssdCache[cache_index].dirty = True  # [KEY] Đánh dấu bẩn
 
         current_latency = SSD_WRITE_LATENCY  # 0.2ms
+        if system.dedup:
+            current_latency += store_content(system, cache_index, new_data)
 
     else:
         # ===== WRITE MISS =====
@@ -193,7 +433,7 @@ def cache_write(system, blockID, new_data):
         system.hddReadCount += 1  # Load từ HDD tính là 1 lần đọc HDD
 
         # Bước 1: Tìm victim
-        victim_index = find_lru_victim(system)
+        victim_index = find_victim(system)
 
         # Bước 2: Nếu victim bẩn → FLUSH
         if system.ssdCache[victim_index].valid and system.ssdCache[victim_index].dirty:
@@ -208,6 +448,11 @@ def cache_write(system, blockID, new_data):
         system.ssdCache[victim_index].dirty = True  # [KEY] Đánh dấu bẩn
 
         current_latency = SSD_WRITE_LATENCY  # 0.2ms
+        if system.dedup:
+            current_latency += store_content(system, victim_index, new_data)
+
+    # Ghi metadata vào journal trước khi xác nhận (ack) với client
+    current_latency += journal_append(system, 'D', blockID, new_data)
 
     system.totalWriteLatency += current_latency
     return current_latency
@@ -216,7 +461,7 @@ def cache_write(system, blockID, new_data):
 def flush_all_cache(system):
     """Flush tất cả dirty blocks xuống HDD"""
     count = 0
-    for i in range(CACHE_SIZE):
+    for i in range(len(system.ssdCache)):
         if system.ssdCache[i].valid and system.ssdCache[i].dirty:
             flush_entry(system, i)
             count += 1
@@ -266,13 +511,20 @@ def parse_workload(filename):
         return []
 
 
+def record_latency(system, latency):
+    """Ghi latency của một request vào histogram (dùng cho latency CDF)"""
+    key = round(latency, 6)
+    system.latencyHistogram[key] = system.latencyHistogram.get(key, 0) + 1
+
+
 def execute_workload(system, operations):
     """Thực thi từng operation trong workload"""
     for op, blockID, value in operations:
         if op == 'R':
-            cache_read(system, blockID)
+            _, latency = cache_read(system, blockID)
+            record_latency(system, latency)
         elif op == 'W':
-            cache_write(system, blockID, value)
+            record_latency(system, cache_write(system, blockID, value))
         elif op == 'F':
             flush_all_cache(system)
 
@@ -352,7 +604,179 @@ def compare_workloads(results):
 
 
 # ============================================================================
-# 7. CHƯƠNG TRÌNH CHÍNH
+# 7. MÔ PHỎNG MẤT ĐIỆN (CRASH-CONSISTENCY)
+# ============================================================================
+
+def recover_after_crash(system):
+    """
+    Khôi phục sau mất điện: metadata cache trong RAM bị mất, chỉ còn HDD và journal.
+    Trả về (số block khôi phục, thời gian khôi phục ms)
+    """
+    recovered = 0
+    recovery_time = 0.0
+
+    if system.journalEnabled:
+        # Replay journal rồi ghi các block bẩn xuống HDD
+        recovery_time += len(system.journal) * JOURNAL_REPLAY_LATENCY
+        dirty = replay_journal(system.journal)
+        for blockID, data in dirty.items():
+            system.hdd[blockID].data = data
+            system.hdd[blockID].written = True
+            recovery_time += HDD_WRITE_LATENCY
+        recovered = len(dirty)
+        system.journal = []
+
+    # Cache khởi động lại ở trạng thái lạnh
+    system.ssdCache.clear()
+    system.contentStore.clear()
+    system.usedBytes = 0
+    system.logicalBlocks = 0
+    return recovered, recovery_time
+
+
+def acked_writes(executed):
+    """Giá trị cuối cùng đã ack cho mỗi block"""
+    acked = {}
+    for op, blockID, value in executed:
+        if op == 'W':
+            acked[blockID] = value
+    return acked
+
+
+def simulate_crash(operations, crash_point, journal=False, system=None):
+    """
+    Chạy trace tới crash_point, mất điện, khôi phục và so sánh HDD với các write đã ack.
+    Truyền `system` để dùng lại một StorageSystem (được reset trước khi chạy)
+    """
+    if system is None:
+        system = StorageSystem(journal)
+    else:
+        system.reset()
+    executed = operations[:crash_point]
+    execute_workload(system, executed)
+    acked = acked_writes(executed)
+
+    report = CrashReport(crash_point, journal)
+    report.ackedWrites = len(acked)
+    report.writeLatency = system.totalWriteLatency
+    report.journalLatency = system.journalLatency
+    report.recoveredBlocks, report.recoveryTime = recover_after_crash(system)
+    report.lostWrites = sum(1 for blockID, value in acked.items() if system.hdd[blockID].data != value)
+    return report
+
+
+def inject_crashes(operations, crash_points=None, num_random=5, seed=42, journal=False):
+    """Mô phỏng crash tại các điểm cho trước, hoặc num_random điểm ngẫu nhiên trong trace"""
+    if crash_points is None:
+        rng = random.Random(seed)
+        crash_points = sorted(rng.sample(range(1, len(operations) + 1), min(num_random, len(operations))))
+    system = StorageSystem(journal)
+    return [simulate_crash(operations, point, journal, system) for point in crash_points]
+
+
+def write_through_system(operations):
+    """Chạy trace bằng Write-Through, trả về StorageSystem của write_through (None nếu không có module)"""
+    try:
+        import write_through
+    except ImportError:
+        return None
+
+    system = write_through.StorageSystem()
+    write_through.execute_workload(system, operations)
+    return system
+
+
+def simulate_write_through_crash(operations, crash_point):
+    """Như simulate_crash nhưng với Write-Through: cache mất khi crash, chỉ còn HDD"""
+    executed = operations[:crash_point]
+    system = write_through_system(executed)
+    if system is None:
+        return None
+
+    acked = acked_writes(executed)
+    report = CrashReport(crash_point, journal=False)
+    report.ackedWrites = len(acked)
+    report.writeLatency = system.totalWriteTime
+    system.ssdCache.clear()  # Không cần khôi phục: cache chỉ chứa bản sao của HDD
+    report.lostWrites = sum(1 for blockID, value in acked.items() if system.hdd[blockID].data != value)
+    return report
+
+
+def compare_durability(name, operations, crash_points=None, num_random=5, seed=42):
+    """So sánh latency và độ bền dữ liệu: Write-Back, Write-Back + Journal, Write-Through"""
+    plain = inject_crashes(operations, crash_points, num_random, seed, journal=False)
+    journaled = inject_crashes(operations, crash_points, num_random, seed, journal=True)
+    if not plain:
+        print(f"✗ {name}: không có điểm crash để mô phỏng")
+        return plain, journaled
+
+    print(f"\n{'=' * 110}")
+    print(f"ĐỘ BỀN DỮ LIỆU KHI MẤT ĐIỆN: {name} (crash tại {', '.join(str(r.crashPoint) for r in plain)})")
+    print(f"{'=' * 110}")
+    print(f"\n{'Chính sách':<35} {'Mất (TB)':<14} {'Mất (%)':<14} {'Khôi phục (ms)':<18} {'Write (ms)':<14} {'Journal (ms)':<14}")
+    print("-" * 110)
+
+    rows = [("Write-Back", plain), ("Write-Back + Journal", journaled)]
+    through = [simulate_write_through_crash(operations, r.crashPoint) for r in plain]
+    if None not in through:
+        rows.append(("Write-Through", through))
+
+    for label, reports in rows:
+        n = len(reports)
+        acked = sum(r.ackedWrites for r in reports)
+        lost = sum(r.lostWrites for r in reports)
+        loss_rate = (lost / acked * 100) if acked > 0 else 0
+        recovery = sum(r.recoveryTime for r in reports) / n
+        write_time = sum(r.writeLatency for r in reports) / n
+        journal_time = sum(r.journalLatency for r in reports) / n
+        print(f"{label:<35} {lost / n:>8.2f}      {loss_rate:>6.2f}%       {recovery:>10.2f}        {write_time:>10.2f}    {journal_time:>10.2f}")
+
+    print(f"\n{'=' * 110}")
+    return plain, journaled
+
+
+# ============================================================================
+# 8. CACHE DEDUP VÀ NÉN
+# ============================================================================
+
+def effective_capacity(system):
+    """Dung lượng hiệu dụng (số block logic) của SSD theo tỉ lệ dedup + nén quan sát được"""
+    if not system.dedup or system.usedBytes == 0:
+        return CACHE_SIZE
+    saving = system.logicalBlocks * BLOCK_SIZE / system.usedBytes
+    return min(CACHE_SIZE * saving, CACHE_SIZE * DEDUP_METADATA_FACTOR)
+
+
+def compare_dedup(name, operations, ratios=(1.0, 2.0, 3.0)):
+    """So sánh cache thường với cache dedup ở các tỉ lệ nén khác nhau"""
+    configs = [("Cache thường", StorageSystem())]
+    for ratio in ratios:
+        label = "Dedup" if ratio <= 1 else f"Dedup + nén {ratio:g}x"
+        configs.append((label, StorageSystem(dedup=True, compression_ratio=ratio)))
+
+    print(f"\n{'=' * 110}")
+    print(f"CACHE DEDUP / NÉN: {name}")
+    print(f"{'=' * 110}")
+    print(f"\n{'Cấu hình':<25} {'Hit rate':<11} {'Δ hit':<10} {'HDD R':<8} {'HDD W':<8} {'Tổng (ms)':<12} {'CPU (ms)':<10} {'Dung lượng (blocks)':<20}")
+    print("-" * 110)
+
+    base_hit_rate = None
+    for label, system in configs:
+        execute_workload(system, operations)
+        total_access = system.cacheHits + system.cacheMisses
+        hit_rate = (system.cacheHits / total_access * 100) if total_access > 0 else 0
+        if base_hit_rate is None:
+            base_hit_rate = hit_rate
+        total_time = system.totalReadLatency + system.totalWriteLatency
+        print(f"{label:<25} {hit_rate:>6.2f}%    {hit_rate - base_hit_rate:>+6.2f}%   {system.hddReadCount:>5}    {system.hddWriteCount:>5}    "
+              f"{total_time:>9.2f}    {system.cpuLatency:>7.2f}    {effective_capacity(system):>10.1f}")
+
+    print(f"\n{'=' * 110}")
+    return configs
+
+
+# ============================================================================
+# 9. CHƯƠNG TRÌNH CHÍNH
 # ============================================================================
 
 def main():
@@ -370,6 +794,7 @@ def main():
     ]
 
     results = []
+    traces = []
 
     for name, filename in configs:
         print(f"\n>>> Đang chạy: {name} ({filename})")
@@ -387,11 +812,26 @@ def main():
 
             print_statistics(sys_sim, name)
             results.append((name, sys_sim))
+            traces.append((name, ops))
 
     # So sánh các workload
     if len(results) == 4:
         compare_workloads(results)
 
+    # Mô phỏng mất điện tại các điểm ngẫu nhiên trong từng workload
+    for name, ops in traces:
+        compare_durability(name, ops)
+
+    # So sánh cache thường với cache dedup + nén
+    for name, ops in traces:
+        compare_dedup(name, ops)
+
+    # Lưu kết quả vào kho để phân tích bằng report.py mà không cần chạy lại
+    if results:
+        import report
+        run_id = report.save_run("write-back", report.module_config(globals()), results, traces)
+        print(f"\n✓ Lưu kết quả: {os.path.join(report.RESULTS_DIR, run_id)}")
+
     print("\n✓ HOÀN THÀNH MÔ PHỎNG WRITE-BACK")
 
 
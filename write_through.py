@@ -27,6 +27,7 @@ class CacheEntry:
         self.data = 0
         self.timestamp = 0
         self.valid = False
+        self.tenant = None  # Tenant/volume sở hữu block (multi-tenant)
 
 
 class HDDEntry:
@@ -35,10 +36,93 @@ class HDDEntry:
         self.data = 0
 
 
+class LazyHDD:
+    """
+    HDD cấp phát lười: chỉ tạo HDDEntry khi block được truy cập lần đầu,
+    block chưa chạm tới mang giá trị mặc định (data = 0)
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.blocks = {}  # blockID -> HDDEntry đã cấp phát
+
+    def __len__(self):
+        return self.capacity
+
+    def __getitem__(self, blockID):
+        entry = self.blocks.get(blockID)
+        if entry is None:
+            if not 0 <= blockID < self.capacity:
+                raise IndexError(f"Block {blockID} nằm ngoài HDD (0..{self.capacity - 1})")
+            entry = self.blocks[blockID] = HDDEntry(blockID)
+        return entry
+
+    def __iter__(self):
+        """Duyệt toàn bộ HDD (chỉ đọc): block chưa chạm tới trả về entry mặc định, không cấp phát"""
+        for blockID in range(self.capacity):
+            entry = self.blocks.get(blockID)
+            yield entry if entry is not None else HDDEntry(blockID)
+
+    def clear(self):
+        self.blocks.clear()
+
+
+class TenantStats:
+    """Thống kê riêng của một tenant/volume khi chia sẻ cache"""
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.requestCount = 0
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.hddReadCount = 0
+        self.hddWriteCount = 0
+        self.totalReadTime = 0.0
+        self.totalWriteTime = 0.0
+
+
+class CachePartition:
+    """
+    Phân vùng cache giữa các tenant.
+
+    mode='static':  way-partitioning tĩnh, mỗi tenant giữ cố định quotas[tenant] slot
+    mode='utility': utility-based (UCP), quotas được tính lại sau mỗi `epoch` truy cập
+                    dựa trên shadow tag LRU của từng tenant
+    """
+    def __init__(self, tenants, mode='static', quotas=None, epoch=100):
+        self.mode = mode
+        self.tenants = list(tenants)
+        self.epoch = epoch
+
+        if quotas is None:
+            # Mặc định: chia đều, phần dư cho các tenant đầu tiên
+            share, extra = divmod(CACHE_SIZE, len(self.tenants))
+            quotas = {t: share + (1 if i < extra else 0) for i, t in enumerate(self.tenants)}
+        self.initialQuotas = dict(quotas)
+        self.reset()
+
+    def reset(self):
+        """Đưa quotas và bộ giám sát UCP về trạng thái ban đầu"""
+        self.quotas = dict(self.initialQuotas)
+        self.accessCount = 0
+
+        # Bộ giám sát UCP: shadow tag (LRU stack) và số hit theo từng vị trí stack
+        self.shadowTags = {t: [] for t in self.tenants}
+        self.wayHits = {t: [0] * CACHE_SIZE for t in self.tenants}
+
+
 class StorageSystem:
-    def __init__(self):
-        self.ssdCache = [CacheEntry() for _ in range(CACHE_SIZE)]
-        self.hdd = [HDDEntry(i) for i in range(HDD_CAPACITY)]
+    def __init__(self, partition=None):
+        # Cache và HDD được cấp phát lười: chi phí khởi tạo theo working set, không theo HDD_CAPACITY
+        self.ssdCache = []  # CacheEntry được thêm khi cần slot mới (tối đa CACHE_SIZE)
+        self.hdd = LazyHDD(HDD_CAPACITY)
+
+        # Multi-tenant: phân vùng cache (None = chia sẻ tự do)
+        self.partition = partition
+        self.reset()
+
+    def reset(self):
+        """Xoá dữ liệu và thống kê để dùng lại hệ thống cho lần chạy mới"""
+        self.ssdCache.clear()
+        self.hdd.clear()
         self.cacheHits = 0
         self.cacheMisses = 0
         self.hddReadCount = 0  # Số lần truy cập HDD khi read
@@ -46,6 +130,10 @@ class StorageSystem:
         self.totalReadTime = 0.0  # Tổng thời gian read
         self.totalWriteTime = 0.0  # Tổng thời gian write
         self.currentTime = 0
+        self.tenantStats = {}  # Thống kê theo tenant
+        self.latencyHistogram = {}  # Latency một request (ms) -> số request
+        if self.partition is not None:
+            self.partition.reset()
 
     def tick(self):
         self.currentTime += 1
@@ -56,21 +144,32 @@ class StorageSystem:
 # ============================================================================
 def find_in_cache(system, blockID):
     """Tìm block trong cache, trả về index hoặc -1"""
-    for i in range(CACHE_SIZE):
+    for i in range(len(system.ssdCache)):
         if system.ssdCache[i].valid and system.ssdCache[i].blockID == blockID:
             return i
     return -1
 
 
+def find_free_slot(system):
+    """Tìm slot trống, cấp phát CacheEntry mới nếu cache chưa đủ CACHE_SIZE slot; -1 nếu đầy"""
+    for i in range(len(system.ssdCache)):
+        if not system.ssdCache[i].valid:
+            return i
+    if len(system.ssdCache) < CACHE_SIZE:
+        system.ssdCache.append(CacheEntry())
+        return len(system.ssdCache) - 1
+    return -1
+
+
 def find_lru_victim(system):
     """Tìm entry có timestamp nhỏ nhất (LRU) hoặc slot trống"""
     min_timestamp = float('inf')
     victim_index = 0
     
     # Bước 1: Tìm slot trống
-    for i in range(CACHE_SIZE):
-        if not system.ssdCache[i].valid:
-            return i
+    free_index = find_free_slot(system)
+    if free_index != -1:
+        return free_index
     
     # Bước 2: Cache đầy → Tìm LRU
     for i in range(CACHE_SIZE):
@@ -81,21 +180,107 @@ def find_lru_victim(system):
     return victim_index
 
 
-def load_to_cache(system, blockID, cache_index):
+def find_partition_victim(system, tenant):
+    """Tìm victim theo way-partitioning: tenant chỉ lấn sang phần của tenant vượt quota"""
+    quotas = system.partition.quotas
+    occupancy = {}
+    for entry in system.ssdCache:
+        if entry.valid:
+            occupancy[entry.tenant] = occupancy.get(entry.tenant, 0) + 1
+
+    if occupancy.get(tenant, 0) < quotas.get(tenant, 0):
+        # Tenant chưa dùng hết phần của mình → slot trống hoặc LRU của tenant đang vượt quota
+        free_index = find_free_slot(system)
+        if free_index != -1:
+            return free_index
+        candidates = [i for i in range(len(system.ssdCache))
+                      if occupancy[system.ssdCache[i].tenant] > quotas.get(system.ssdCache[i].tenant, 0)]
+    else:
+        # Tenant đã dùng đủ quota → tự thay thế LRU của chính mình
+        candidates = [i for i in range(len(system.ssdCache)) if system.ssdCache[i].tenant == tenant]
+
+    if not candidates:
+        return find_lru_victim(system)
+    return min(candidates, key=lambda i: system.ssdCache[i].timestamp)
+
+
+def find_victim(system, tenant=None):
+    """Chọn victim: LRU toàn cục, hoặc theo phân vùng nếu hệ thống có partition"""
+    if system.partition is None or tenant is None:
+        return find_lru_victim(system)
+    return find_partition_victim(system, tenant)
+
+
+def lookahead_allocation(wayHits, total_slots):
+    """
+    Thuật toán lookahead của UCP: lần lượt cấp slot cho tenant có
+    marginal utility (số hit tăng thêm / số slot) lớn nhất
+    """
+    tenants = list(wayHits)
+    alloc = {t: 1 for t in tenants}  # Mỗi tenant giữ tối thiểu 1 slot
+    balance = total_slots - len(tenants)
+
+    while balance > 0:
+        best_tenant, best_mu, best_k = None, 0.0, 0
+        for t in tenants:
+            gained = 0
+            for k in range(1, balance + 1):
+                gained += wayHits[t][alloc[t] + k - 1]
+                if gained / k > best_mu:
+                    best_tenant, best_mu, best_k = t, gained / k, k
+
+        if best_tenant is None:
+            # Không tenant nào còn thu thêm hit → chia đều phần còn lại
+            for i in range(balance):
+                alloc[tenants[i % len(tenants)]] += 1
+            break
+
+        alloc[best_tenant] += best_k
+        balance -= best_k
+
+    return alloc
+
+
+def track_utility(system, tenant, blockID):
+    """Cập nhật shadow tag UCP và tính lại quotas khi hết epoch"""
+    partition = system.partition
+    if partition is None or partition.mode != 'utility' or tenant not in partition.shadowTags:
+        return
+
+    stack = partition.shadowTags[tenant]
+    if blockID in stack:
+        position = stack.index(blockID)
+        partition.wayHits[tenant][position] += 1  # Hit nếu tenant có >= position+1 slot
+        stack.pop(position)
+    stack.insert(0, blockID)
+    if len(stack) > CACHE_SIZE:
+        stack.pop()
+
+    partition.accessCount += 1
+    if partition.accessCount % partition.epoch == 0:
+        partition.quotas = lookahead_allocation(partition.wayHits, CACHE_SIZE)
+        # Giảm một nửa bộ đếm để thích nghi với thay đổi của workload
+        for t in partition.tenants:
+            partition.wayHits[t] = [h // 2 for h in partition.wayHits[t]]
+
+
+def load_to_cache(system, blockID, cache_index, tenant=None):
     """Load block từ HDD vào cache"""
     data = system.hdd[blockID].data
     system.ssdCache[cache_index].blockID = blockID
     system.ssdCache[cache_index].data = data
     system.ssdCache[cache_index].timestamp = system.currentTime
     system.ssdCache[cache_index].valid = True
+    system.ssdCache[cache_index].tenant = tenant
 
 
 # ============================================================================
 # 4. HÀM ĐỌC/GHI WRITE-THROUGH
 # ============================================================================
-def cache_read(system, blockID):
+def cache_read(system, blockID, tenant=None):
     """Đọc block từ cache (Write-Through policy)"""
     system.tick()
+    track_utility(system, tenant, blockID)
     cache_index = find_in_cache(system, blockID)
     
     if cache_index != -1:
@@ -117,18 +302,19 @@ def cache_read(system, blockID):
         system.totalReadTime += latency
         
         data = system.hdd[blockID].data
-        victim_index = find_lru_victim(system)
-        load_to_cache(system, blockID, victim_index)
+        victim_index = find_victim(system, tenant)
+        load_to_cache(system, blockID, victim_index, tenant)
         
         return data, latency
 
 
-def cache_write_through(system, blockID, new_data):
+def cache_write_through(system, blockID, new_data, tenant=None):
     """
     Ghi block vào cache và HDD (Write-Through policy)
     
     """
     system.tick()
+    track_utility(system, tenant, blockID)
     total_latency = 0.0
     cache_index = find_in_cache(system, blockID)
 
@@ -146,8 +332,8 @@ def cache_write_through(system, blockID, new_data):
         system.hddReadCount += 1
         
         # Load block vào cache
-        victim_index = find_lru_victim(system)
-        load_to_cache(system, blockID, victim_index)
+        victim_index = find_victim(system, tenant)
+        load_to_cache(system, blockID, victim_index, tenant)
         
         # Cập nhật data mới
         system.ssdCache[victim_index].data = new_data
@@ -206,13 +392,20 @@ def parse_workload(filename):
         return []
 
 
+def record_latency(system, latency):
+    """Ghi latency của một request vào histogram (dùng cho latency CDF)"""
+    key = round(latency, 6)
+    system.latencyHistogram[key] = system.latencyHistogram.get(key, 0) + 1
+
+
 def execute_workload(system, operations):
     """Thực thi từng operation trong workload"""
     for op, blockID, value in operations:
         if op == 'R':
-            cache_read(system, blockID)
+            _, latency = cache_read(system, blockID)
+            record_latency(system, latency)
         elif op == 'W':
-            cache_write_through(system, blockID, value)
+            record_latency(system, cache_write_through(system, blockID, value))
         elif op == 'F':
             # Write-Through không cần flush (đã ghi HDD ngay)
             pass
@@ -354,7 +547,151 @@ def compare_four_workloads(results):
 
 
 # ============================================================================
-# 8. CHƯƠNG TRÌNH CHÍNH
+# 8. MULTI-TENANT: PHÂN VÙNG CACHE VÀ THỐNG KÊ THEO TENANT
+# ============================================================================
+def interleave_workloads(traces, mode='round_robin', seed=None):
+    """
+    Trộn nhiều workload thành một luồng request gắn tenant.
+
+    traces: list (tenant, operations). Mỗi tenant (volume) được cấp một vùng HDD
+    riêng, blockID được dịch sang vùng đó. Trả về list (tenant, op, blockID, value).
+    mode='round_robin' lần lượt từng tenant, mode='random' chọn ngẫu nhiên tenant
+    còn request (vẫn giữ thứ tự bên trong mỗi workload).
+    """
+    region = HDD_CAPACITY // len(traces)
+    queues = []
+    for idx, (tenant, ops) in enumerate(traces):
+        base = idx * region
+        tagged = []
+        for op, blockID, value in ops:
+            if blockID is not None:
+                if blockID >= region:
+                    raise ValueError(f"Block {blockID} của tenant {tenant} vượt vùng HDD ({region} blocks)")
+                blockID += base
+            tagged.append((tenant, op, blockID, value))
+        queues.append(tagged)
+
+    rng = random.Random(seed)
+    positions = [0] * len(queues)
+    active = [i for i in range(len(queues)) if queues[i]]
+    merged = []
+    turn = 0
+
+    while active:
+        if mode == 'random':
+            i = rng.choice(active)
+        else:
+            i = active[turn % len(active)]
+            turn += 1
+        merged.append(queues[i][positions[i]])
+        positions[i] += 1
+        if positions[i] == len(queues[i]):
+            pos = active.index(i)
+            active.remove(i)
+            if mode != 'random':
+                turn = pos  # Tenant kế tiếp dịch lên vị trí vừa xoá
+
+    return merged
+
+
+def execute_multi_tenant(system, tagged_operations):
+    """Thực thi luồng request đã gắn tenant và ghi nhận thống kê riêng cho từng tenant"""
+    for tenant, op, blockID, value in tagged_operations:
+        if op not in ('R', 'W'):
+            continue  # Write-Through không cần flush
+
+        if tenant not in system.tenantStats:
+            system.tenantStats[tenant] = TenantStats(tenant)
+        stats = system.tenantStats[tenant]
+        stats.requestCount += 1
+        hdd_reads = system.hddReadCount
+        hdd_writes = system.hddWriteCount
+
+        if op == 'R':
+            hits = system.cacheHits
+            _, latency = cache_read(system, blockID, tenant)
+            record_latency(system, latency)
+            if system.cacheHits > hits:
+                stats.cacheHits += 1
+            else:
+                stats.cacheMisses += 1
+            stats.totalReadTime += latency
+        else:
+            latency = cache_write_through(system, blockID, value, tenant)
+            record_latency(system, latency)
+            stats.totalWriteTime += latency
+
+        stats.hddReadCount += system.hddReadCount - hdd_reads
+        stats.hddWriteCount += system.hddWriteCount - hdd_writes
+
+
+def run_multi_tenant(traces, partition=None, mode='round_robin', seed=42):
+    """Chạy nhiều workload xen kẽ trên một cache dùng chung"""
+    system = StorageSystem(partition)
+    execute_multi_tenant(system, interleave_workloads(traces, mode, seed))
+    return system
+
+
+def tenant_hit_rate(stats):
+    total = stats.cacheHits + stats.cacheMisses
+    return (stats.cacheHits / total * 100) if total > 0 else 0
+
+
+def tenant_avg_latency(stats):
+    return (stats.totalReadTime + stats.totalWriteTime) / stats.requestCount if stats.requestCount > 0 else 0
+
+
+def compare_multi_tenant(traces, mode='round_robin', seed=42):
+    """
+    So sánh từng tenant khi chạy riêng (isolated), chia sẻ tự do (shared),
+    way-partitioning tĩnh (static) và utility-based động (UCP)
+    """
+    tenants = [t for t, _ in traces]
+
+    # Chạy riêng: mỗi tenant có toàn bộ cache
+    isolated = {}
+    for tenant, ops in traces:
+        isolated[tenant] = run_multi_tenant([(tenant, ops)]).tenantStats.get(tenant, TenantStats(tenant))
+
+    runs = [
+        ("Isolated", isolated),
+        ("Shared", run_multi_tenant(traces, None, mode, seed).tenantStats),
+        ("Static", run_multi_tenant(traces, CachePartition(tenants, 'static'), mode, seed).tenantStats),
+        ("UCP", run_multi_tenant(traces, CachePartition(tenants, 'utility'), mode, seed).tenantStats),
+    ]
+
+    print(f"\n{'=' * 110}")
+    print(f"BẢNG SO SÁNH MULTI-TENANT ({len(tenants)} tenant, xen kẽ: {mode})")
+    print(f"{'=' * 110}")
+
+    metrics = [
+        ("Hit Rate (%)", lambda s: f"{tenant_hit_rate(s):>6.2f}%"),
+        ("Số lần truy cập HDD (Read)", lambda s: f"{s.hddReadCount:>7}"),
+        ("Số lần truy cập HDD (Write)", lambda s: f"{s.hddWriteCount:>7}"),
+        ("Latency TB / request (ms)", lambda s: f"{tenant_avg_latency(s):>10.2f}"),
+    ]
+
+    for label, fmt in metrics:
+        print(f"\n{label:<35} " + ''.join(f"{name:<18}" for name, _ in runs))
+        print("-" * 110)
+        for tenant in tenants:
+            cells = [fmt(stats.get(tenant, TenantStats(tenant))) for _, stats in runs]
+            print(f"{tenant:<35} " + ''.join(f"{c:<18}" for c in cells))
+
+    # Noisy-neighbour: mức giảm hit rate khi chia sẻ so với chạy riêng
+    print(f"\n{'Noisy-neighbour (Δ hit rate)':<35} " + ''.join(f"{name:<18}" for name, _ in runs[1:]))
+    print("-" * 110)
+    for tenant in tenants:
+        base = tenant_hit_rate(isolated[tenant])
+        cells = [f"{tenant_hit_rate(stats.get(tenant, TenantStats(tenant))) - base:>+6.2f}%" for _, stats in runs[1:]]
+        print(f"{tenant:<35} " + ''.join(f"{c:<18}" for c in cells))
+
+    print(f"\n{'=' * 110}")
+    return runs
+
+
+# ============================================================================
+# 9. CHƯƠNG TRÌNH CHÍNH
 # ============================================================================
 def main():
     random.seed(42)  # Đảm bảo kết quả lặp lại được
@@ -380,6 +717,7 @@ def main():
 
     # Chạy 4 test cases
     results = []
+    traces = []
 
     configs = [
         ("Random", "workload_random.txt"),
@@ -404,11 +742,22 @@ def main():
             execute_workload(sys, ops)
             print_statistics(sys, name)
             results.append((name, sys))
+            traces.append((name, ops))
 
     # So sánh 4 workloads
     if len(results) == 4:
         compare_four_workloads(results)
 
+    # Chạy xen kẽ 4 workload trên cùng một cache (multi-tenant)
+    if len(traces) > 1:
+        compare_multi_tenant(traces)
+
+    # Lưu kết quả vào kho để phân tích bằng report.py mà không cần chạy lại
+    if results:
+        import report
+        run_id = report.save_run("write-through", report.module_config(globals()), results, traces)
+        print(f"\n✓ Lưu kết quả: {os.path.join(report.RESULTS_DIR, run_id)}")
+
     print("\n✓ HOÀN THÀNH MÔ PHỎNG WRITE-THROUGH")
 
 